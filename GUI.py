@@ -3,7 +3,7 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import sys
 from io import StringIO
-from typing import Any, List, Optional, Dict, Union
+from typing import List, Optional, Dict, Union
 import queue
 import threading
 
@@ -20,13 +20,18 @@ class JuniorCodeGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("JuniorCode IDE")
-        self.root.geometry("800x600")
+        self.root.geometry("800x760")
         
         # Input handling setup
         self.input_queue = queue.Queue()
         self.input_event = threading.Event()
         self.waiting_for_input = False
         
+        # Debugger handling setup
+        self.debug_event = threading.Event()
+        self.debug_command = "continue"
+        self.debugger = None
+        
         # Configure root grid
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(0, weight=1)
@@ -109,6 +114,30 @@ class JuniorCodeGUI:
         )
         self.example_button.grid(row=0, column=2, padx=5)
         
+        # Create Run Selection button
+        self.run_selection_button = ttk.Button(
+            self.button_frame,
+            text="Run Selection",
+            command=self.run_selection
+        )
+        self.run_selection_button.grid(row=0, column=3, padx=5)
+        
+        # Create Show Variables button
+        self.variables_button = ttk.Button(
+            self.button_frame,
+            text="Show Variables",
+            command=self.show_variables
+        )
+        self.variables_button.grid(row=0, column=4, padx=5)
+        
+        # Create Reset Session button
+        self.reset_button = ttk.Button(
+            self.button_frame,
+            text="Reset Session",
+            command=self.reset_session
+        )
+        self.reset_button.grid(row=0, column=5, padx=5)
+        
         # Create input frame
         self.input_frame = ttk.Frame(self.main_container)
         self.input_frame.grid(row=3, column=0, pady=(10, 0))
@@ -129,6 +158,68 @@ class JuniorCodeGUI:
         # Bind enter key to submit input
         self.input_entry.bind("<Return>", lambda e: self.submit_input())
         
+        # Create debugger frame
+        self.debug_frame = ttk.LabelFrame(self.main_container, text="Debugger")
+        self.debug_frame.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+        self.debug_frame.grid_columnconfigure(1, weight=1)
+        self.debug_frame.grid_columnconfigure(3, weight=1)
+        
+        # Create breakpoint and watch entries
+        ttk.Label(self.debug_frame, text="Breakpoints:").grid(row=0, column=0, padx=5, pady=5)
+        self.breakpoints_entry = ttk.Entry(self.debug_frame)
+        self.breakpoints_entry.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
+        ttk.Label(self.debug_frame, text="Watch:").grid(row=0, column=2, padx=5, pady=5)
+        self.watches_entry = ttk.Entry(self.debug_frame)
+        self.watches_entry.grid(row=0, column=3, sticky="ew", padx=5, pady=5)
+        
+        # Create debugger buttons
+        self.debug_button_frame = ttk.Frame(self.debug_frame)
+        self.debug_button_frame.grid(row=1, column=0, columnspan=4)
+        self.debug_button = ttk.Button(
+            self.debug_button_frame,
+            text="Debug",
+            command=self.debug_code
+        )
+        self.debug_button.grid(row=0, column=0, padx=5)
+        self.step_button = ttk.Button(
+            self.debug_button_frame,
+            text="Step",
+            command=lambda: self._resume_debugger("step"),
+            state="disabled"
+        )
+        self.step_button.grid(row=0, column=1, padx=5)
+        self.continue_button = ttk.Button(
+            self.debug_button_frame,
+            text="Continue",
+            command=lambda: self._resume_debugger("continue"),
+            state="disabled"
+        )
+        self.continue_button.grid(row=0, column=2, padx=5)
+        self.stop_button = ttk.Button(
+            self.debug_button_frame,
+            text="Stop",
+            command=lambda: self._resume_debugger("stop"),
+            state="disabled"
+        )
+        self.stop_button.grid(row=0, column=3, padx=5)
+        
+        # Create pause status label
+        self.debug_status = ttk.Label(self.debug_frame, text="Breakpoints look like: 3, 7 if i > 2")
+        self.debug_status.grid(row=2, column=0, columnspan=4, pady=(5, 0))
+        
+        # Create variables table shown while paused
+        self.variables_tree = ttk.Treeview(
+            self.debug_frame,
+            columns=("value",),
+            height=4
+        )
+        self.variables_tree.heading("#0", text="Variable")
+        self.variables_tree.heading("value", text="Value")
+        self.variables_tree.grid(row=3, column=0, columnspan=4, sticky="ew", padx=5, pady=5)
+        
+        # Highlight for the line the debugger is paused on
+        self.code_editor.tag_configure("paused", background="#fff3a0")
+        
         # Bind window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -138,18 +229,23 @@ class JuniorCodeGUI:
                 super().__init__()
                 self.gui = gui
                 self._stdout = CustomStringIO(gui)
-                sys.stdout = self._stdout
 
-            def evaluate(self, node: ASTNode) -> Any:
-                if isinstance(node, AskNode):
-                    return self.gui.get_input(node.prompt)
-                return super().evaluate(node)
+            def interpret(self, nodes: List[ASTNode]):
+                # Redirect only while running, since a session interpreter outlives a single run
+                sys.stdout = self._stdout
+                try:
+                    return super().interpret(nodes)
+                finally:
+                    sys.stdout = sys.__stdout__
 
-            def __del__(self):
-                sys.stdout = sys.__stdout__
+            def ask(self, prompt: str) -> str:
+                return self.gui.get_input(prompt)
         
         self.interpreter_class = GUIInterpreter
         
+        # Session that keeps variables between "Run Selection" clicks
+        self.session = Session(self.interpreter_class(self))
+        
         # Initialize input entry as disabled
         self.input_entry.config(state="disabled")
 
@@ -204,8 +300,8 @@ class JuniorCodeGUI:
         # Get code from editor
         code = self.code_editor.get(1.0, tk.END).strip()
         
-        # Disable run button during execution
-        self.run_button.config(state="disabled")
+        # Disable run buttons during execution
+        self._set_run_buttons_state("disabled")
         
         def execute():
             try:
@@ -217,6 +313,9 @@ class JuniorCodeGUI:
                 parser = Parser(tokens)
                 ast = parser.parse()
                 
+                # Cache work that doesn't change inside loops
+                ast = Optimizer().optimize(ast)
+                
                 # Create interpreter and run the code
                 interpreter = self.interpreter_class(self)
                 interpreter.interpret(ast)
@@ -224,8 +323,8 @@ class JuniorCodeGUI:
             except Exception as e:
                 self.update_output(f"Error: {str(e)}\n")
             finally:
-                # Re-enable run button after execution
-                self.root.after(0, lambda: self.run_button.config(state="normal"))
+                # Re-enable run buttons after execution
+                self.root.after(0, self._set_run_buttons_state, "normal")
                 # Reset input state if execution ends while waiting for input
                 if self.waiting_for_input:
                     self.root.after(0, self._reset_input_state)
@@ -233,6 +332,49 @@ class JuniorCodeGUI:
         # Run code in a separate thread
         threading.Thread(target=execute, daemon=True).start()
 
+    def run_selection(self):
+        """Run the selected lines (or the current line) in the ongoing session"""
+        try:
+            code = self.code_editor.get("sel.first linestart", "sel.last lineend")
+        except tk.TclError:
+            code = self.code_editor.get("insert linestart", "insert lineend")
+        code = code.strip()
+        if not code:
+            return
+        
+        if not self.session.is_complete(code):
+            self.update_output("Error: Oops! Your selection has a '{' without its '}'\n")
+            return
+        
+        # Disable run buttons during execution
+        self._set_run_buttons_state("disabled")
+        
+        def execute():
+            try:
+                self.session.execute(code)
+            except Exception as e:
+                self.update_output(f"Error: {str(e)}\n")
+            finally:
+                self.root.after(0, self._set_run_buttons_state, "normal")
+                if self.waiting_for_input:
+                    self.root.after(0, self._reset_input_state)
+        
+        threading.Thread(target=execute, daemon=True).start()
+
+    def show_variables(self):
+        """Print the variables the session currently knows about"""
+        self.update_output("Variables:\n" + self.session.dump() + "\n")
+
+    def reset_session(self):
+        """Forget every variable in the session"""
+        self.session.reset()
+        self.update_output("All variables forgotten!\n")
+
+    def _set_run_buttons_state(self, state):
+        """Enable or disable every button that starts running code"""
+        for button in (self.run_button, self.run_selection_button, self.reset_button, self.debug_button):
+            button.config(state=state)
+
     def _reset_input_state(self):
         """Reset the input state and controls"""
         self.waiting_for_input = False
@@ -265,11 +407,88 @@ repeat i 1 to 5 {
         self.code_editor.delete(1.0, tk.END)
         self.code_editor.insert(1.0, example_code)
 
+    def debug_code(self):
+        """Run the code in the editor under the debugger"""
+        try:
+            debugger = Debugger(self._debug_pause)
+            for item in self.breakpoints_entry.get().split(","):
+                if item.strip():
+                    line, _, condition = item.partition(" if ")
+                    debugger.add_breakpoint(int(line), condition.strip() or None)
+            for name in self.watches_entry.get().replace(",", " ").split():
+                debugger.add_watch(name)
+        except (ValueError, SyntaxError) as e:
+            self.update_output(f"Error: Oops! I don't understand those breakpoints: {str(e)}\n")
+            return
+        
+        # Clear previous output
+        self.output_text.delete(1.0, tk.END)
+        
+        # Keep leading blank lines so line numbers match the editor
+        code = self.code_editor.get(1.0, tk.END).rstrip()
+        
+        self._set_run_buttons_state("disabled")
+        self.debugger = debugger
+        
+        def execute():
+            try:
+                tokens = Lexer(code).tokenize()
+                ast = Optimizer().optimize(Parser(tokens).parse())
+                interpreter = self.interpreter_class(self)
+                debugger.attach(interpreter, ast)
+                interpreter.interpret(ast)
+            except Exception as e:
+                self.update_output(f"Error: {str(e)}\n")
+            finally:
+                self.debugger = None
+                self.root.after(0, self._set_run_buttons_state, "normal")
+                self.root.after(0, self._clear_pause, "Finished")
+                if self.waiting_for_input:
+                    self.root.after(0, self._reset_input_state)
+        
+        threading.Thread(target=execute, daemon=True).start()
+
+    def _debug_pause(self, debugger, line, reason):
+        """Called from the interpreter thread; waits for Step, Continue or Stop"""
+        variables = dict(debugger.interpreter.variables)
+        self.debug_event.clear()
+        self.root.after(0, self._show_pause, line, reason, variables)
+        self.debug_event.wait()
+        return self.debug_command
+
+    def _show_pause(self, line, reason, variables):
+        """Show where the program is paused and what its variables hold"""
+        self.debug_status.config(text=f"Paused at line {line}: {reason}")
+        self.code_editor.tag_remove("paused", 1.0, tk.END)
+        self.code_editor.tag_add("paused", f"{line}.0", f"{line}.end")
+        self.code_editor.see(f"{line}.0")
+        self.variables_tree.delete(*self.variables_tree.get_children())
+        for name, value in variables.items():
+            self.variables_tree.insert("", tk.END, text=name, values=(repr(value),))
+        for button in (self.step_button, self.continue_button, self.stop_button):
+            button.config(state="normal")
+
+    def _resume_debugger(self, command):
+        """Let the paused program carry on"""
+        self.debug_command = command
+        self._clear_pause("Running...")
+        self.debug_event.set()
+
+    def _clear_pause(self, status):
+        """Remove the paused-line highlight and disable the stepping buttons"""
+        self.debug_status.config(text=status)
+        self.code_editor.tag_remove("paused", 1.0, tk.END)
+        for button in (self.step_button, self.continue_button, self.stop_button):
+            button.config(state="disabled")
+
     def on_closing(self):
         """Handle window closing event"""
         # Ensure any waiting input operations are unblocked
         if self.waiting_for_input:
             self._reset_input_state()
+        if self.debugger is not None:
+            self.debug_command = "stop"
+            self.debug_event.set()
         self.root.destroy()
 
 def main():
@@ -1,12 +1,15 @@
-import re
-from dataclasses import dataclass
-from typing import Any, List, Optional, Dict, Union
+import itertools
+import marshal
+import os
+import sys
+import time
+import zlib
+from typing import Any, Callable, List, NamedTuple, Optional, Dict, Union
 
 # ==========================
 # LEXER (Tokenizer)
 # ==========================
-@dataclass
-class Token:
+class Token(NamedTuple):
     type: str
     value: Any
     line: int
@@ -169,7 +172,9 @@ class Lexer:
 # PARSER
 # ==========================
 class ASTNode:
-    pass
+    # Where the statement starts in the source code, filled in by the parser
+    line: int = 0
+    column: int = 0
 
 class ShowNode(ASTNode):
     def __init__(self, value: Any):
@@ -212,6 +217,25 @@ class AskNode(ASTNode):
     def __init__(self, prompt: str):
         self.prompt = prompt
 
+class CachedNode(ASTNode):
+    """An expression whose value is remembered in the interpreter cache under `slot`"""
+    def __init__(self, expr: Any, slot: int):
+        self.expr = expr
+        self.slot = slot
+
+class CacheScopeNode(ASTNode):
+    """Evaluates `node`, then forgets the values it cached in `slots`"""
+    def __init__(self, node: Any, slots: List[int]):
+        self.node = node
+        self.slots = slots
+
+class TraceNode(ASTNode):
+    """A statement the debugger wants to look at before and after it runs"""
+    def __init__(self, statement: ASTNode, debugger: 'Debugger'):
+        self.statement = statement
+        self.debugger = debugger
+        self.line = Debugger.line_of(statement)
+
 class Parser:
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
@@ -226,17 +250,20 @@ class Parser:
     def parse_statement(self) -> ASTNode:
         token = self.peek()
         
-        if token.type == 'KEYWORD':
+        if token.type == 'KEYWORD' and token.value in ('show', 'var', 'if', 'repeat', 'loop'):
             if token.value == 'show':
-                return self.parse_show()
+                node = self.parse_show()
             elif token.value == 'var':
-                return self.parse_var()
+                node = self.parse_var()
             elif token.value == 'if':
-                return self.parse_if()
+                node = self.parse_if()
             elif token.value == 'repeat':
-                return self.parse_repeat()
-            elif token.value == 'loop':
-                return self.parse_loop()
+                node = self.parse_repeat()
+            else:
+                node = self.parse_loop()
+            node.line = token.line
+            node.column = token.column
+            return node
             
         self.raise_error("Oops! I was expecting a statement here!")
 
@@ -382,12 +409,170 @@ class Parser:
             raise SyntaxError(f"{message}\nLine {token.line}, Column {token.column}")
         raise SyntaxError(message)
 
+def dump_ast(nodes: List[ASTNode], show_cache: bool = True) -> str:
+    """The tree as indented text; without `show_cache` the optimizer's nodes are left out"""
+    lines = []
+    for node in nodes:
+        _dump_node(node, 0, lines, "", show_cache)
+    return "\n".join(lines)
+
+def _dump_node(node: Any, depth: int, lines: List[str], label: str = "", show_cache: bool = True):
+    pad = "  " * depth + label
+    if isinstance(node, ShowNode):
+        lines.append(f"{pad}Show (line {node.line})")
+        _dump_node(node.value, depth + 1, lines, "", show_cache)
+    elif isinstance(node, VarNode):
+        lines.append(f"{pad}Var {node.name} (line {node.line})")
+        _dump_node(node.value, depth + 1, lines, "", show_cache)
+    elif isinstance(node, IdentifierNode):
+        lines.append(f"{pad}Identifier {node.name}")
+    elif isinstance(node, BinaryOpNode):
+        lines.append(f"{pad}{node.operator}")
+        _dump_node(node.left, depth + 1, lines, "", show_cache)
+        _dump_node(node.right, depth + 1, lines, "", show_cache)
+    elif isinstance(node, IfNode):
+        lines.append(f"{pad}If (line {node.line})")
+        _dump_node(node.condition, depth + 1, lines, "condition: ", show_cache)
+        _dump_body(node.if_body, depth + 1, lines, "then:", show_cache)
+        if node.else_body is not None:
+            _dump_body(node.else_body, depth + 1, lines, "else:", show_cache)
+    elif isinstance(node, RepeatNode):
+        lines.append(f"{pad}Repeat {node.var_name} {node.start} to {node.end} (line {node.line})")
+        _dump_body(node.body, depth + 1, lines, "body:", show_cache)
+    elif isinstance(node, LoopNode):
+        lines.append(f"{pad}Loop (line {node.line})")
+        _dump_node(node.condition, depth + 1, lines, "condition: ", show_cache)
+        _dump_body(node.body, depth + 1, lines, "body:", show_cache)
+    elif isinstance(node, AskNode):
+        lines.append(f"{pad}Ask {node.prompt!r}")
+    elif isinstance(node, CachedNode):
+        if show_cache:
+            lines.append(f"{pad}Cached #{node.slot}")
+            _dump_node(node.expr, depth + 1, lines, "", show_cache)
+        else:
+            _dump_node(node.expr, depth, lines, label, show_cache)
+    elif isinstance(node, CacheScopeNode):
+        if show_cache:
+            lines.append(f"{pad}Cache scope {node.slots}")
+            _dump_node(node.node, depth + 1, lines, "", show_cache)
+        else:
+            _dump_node(node.node, depth, lines, label, show_cache)
+    elif isinstance(node, TraceNode):
+        _dump_node(node.statement, depth, lines, label, show_cache)
+    else:
+        lines.append(f"{pad}{node!r}")
+
+def _dump_body(body: List[ASTNode], depth: int, lines: List[str], label: str, show_cache: bool = True):
+    lines.append("  " * depth + label)
+    for node in body:
+        _dump_node(node, depth + 1, lines, "", show_cache)
+
+# ==========================
+# OPTIMIZER
+# ==========================
+class Optimizer:
+    """Caches loop-invariant expressions and repeated subexpressions.
+
+    An expression inside a loop is invariant when none of the variables it
+    reads are assigned anywhere in the loop body. It is worked out the first
+    time the loop needs it and then reused until the loop finishes, so errors
+    still happen at the same moment and in the same order.
+    """
+    _slots = itertools.count()
+
+    def optimize(self, nodes: List[ASTNode]) -> List[ASTNode]:
+        return self.optimize_body(nodes, [])
+
+    def optimize_body(self, nodes: List[ASTNode], loops: List[tuple]) -> List[ASTNode]:
+        return [self.optimize_statement(node, loops) for node in nodes]
+
+    def optimize_statement(self, node: ASTNode, loops: List[tuple]) -> ASTNode:
+        # `loops` holds (assigned names, slot table) for each enclosing loop, outermost first
+        if isinstance(node, (ShowNode, VarNode)):
+            node.value = self.optimize_expression(node.value, loops)
+        elif isinstance(node, IfNode):
+            node.condition = self.optimize_expression(node.condition, loops)
+            node.if_body = self.optimize_body(node.if_body, loops)
+            if node.else_body:
+                node.else_body = self.optimize_body(node.else_body, loops)
+        elif isinstance(node, (RepeatNode, LoopNode)):
+            loop = (self.assigned_names([node], set()), {})
+            loops = loops + [loop]
+            if isinstance(node, LoopNode):
+                node.condition = self.optimize_expression(node.condition, loops)
+            node.body = self.optimize_body(node.body, loops)
+            if loop[1]:
+                return CacheScopeNode(node, list(loop[1].values()))
+        return node
+
+    def optimize_expression(self, expr: Any, loops: List[tuple]) -> Any:
+        if not isinstance(expr, BinaryOpNode):
+            return expr
+        info = {}
+        self.analyze(expr, info)
+        counts = {}
+        for key, _ in info.values():
+            counts[key] = counts.get(key, 0) + 1
+        shared = {}
+        expr = self.cache_expression(expr, loops, info, counts, shared)
+        if shared:
+            return CacheScopeNode(expr, list(shared.values()))
+        return expr
+
+    def cache_expression(self, expr: Any, loops: List[tuple], info: dict, counts: dict, shared: dict) -> Any:
+        if not isinstance(expr, BinaryOpNode):
+            return expr
+        key, names = info[id(expr)]
+        for assigned, slots in loops:
+            if not names & assigned:
+                if key not in slots:
+                    slots[key] = next(self._slots)
+                return CachedNode(expr, slots[key])
+        expr.left = self.cache_expression(expr.left, loops, info, counts, shared)
+        expr.right = self.cache_expression(expr.right, loops, info, counts, shared)
+        if counts[key] > 1:
+            if key not in shared:
+                shared[key] = next(self._slots)
+            return CachedNode(expr, shared[key])
+        return expr
+
+    def analyze(self, expr: Any, info: dict) -> tuple:
+        """Returns a structural key for `expr` and the variable names it reads"""
+        if isinstance(expr, BinaryOpNode):
+            left_key, left_names = self.analyze(expr.left, info)
+            right_key, right_names = self.analyze(expr.right, info)
+            key = (expr.operator, left_key, right_key)
+            names = left_names | right_names
+            info[id(expr)] = (key, names)
+            return key, names
+        if isinstance(expr, IdentifierNode):
+            return ('IDENTIFIER', expr.name), frozenset([expr.name])
+        # 1, 1.0 and True compare equal but don't behave the same, so keep the type
+        return (type(expr).__name__, expr), frozenset()
+
+    def assigned_names(self, nodes: List[ASTNode], names: set) -> set:
+        for node in nodes:
+            if isinstance(node, VarNode):
+                names.add(node.name)
+            elif isinstance(node, IfNode):
+                self.assigned_names(node.if_body, names)
+                self.assigned_names(node.else_body or [], names)
+            elif isinstance(node, RepeatNode):
+                names.add(node.var_name)
+                self.assigned_names(node.body, names)
+            elif isinstance(node, LoopNode):
+                self.assigned_names(node.body, names)
+        return names
+
 # ==========================
 # INTERPRETER
 # ==========================
 class Interpreter:
     def __init__(self):
         self.variables: Dict[str, Any] = {}
+        self.cache: Dict[int, Any] = {}
+        # How many `ask` questions got an answer, whatever ask() was replaced with
+        self.answered = 0
 
     def interpret(self, nodes: List[ASTNode]):
         result = None
@@ -410,6 +595,13 @@ class Interpreter:
             left = self.evaluate(node.left)
             right = self.evaluate(node.right)
             return self.evaluate_operation(left, node.operator, right)
+        elif isinstance(node, CachedNode):
+            try:
+                return self.cache[node.slot]
+            except KeyError:
+                value = self.evaluate(node.expr)
+                self.cache[node.slot] = value
+                return value
         elif isinstance(node, IfNode):
             condition_value = self.evaluate(node.condition)
             if condition_value:
@@ -427,11 +619,27 @@ class Interpreter:
             while self.evaluate(node.condition):
                 for statement in node.body:
                     self.evaluate(statement)
+        elif isinstance(node, CacheScopeNode):
+            try:
+                return self.evaluate(node.node)
+            finally:
+                for slot in node.slots:
+                    self.cache.pop(slot, None)
+        elif isinstance(node, TraceNode):
+            node.debugger.before(node)
+            result = self.evaluate(node.statement)
+            node.debugger.after(node)
+            return result
         elif isinstance(node, AskNode):
-            return input(node.prompt + " ")
+            answer = self.ask(node.prompt)
+            self.answered += 1
+            return answer
         else:
             return node
 
+    def ask(self, prompt: str) -> str:
+        return input(prompt + " ")
+
     def evaluate_operation(self, left: Any, operator: str, right: Any) -> Any:
         # First convert operands to strings if either operand is a string and we're doing addition
         if operator == 'PLUS' and (isinstance(left, str) or isinstance(right, str)):
@@ -463,6 +671,449 @@ class Interpreter:
         else:
             raise ValueError(f"Oops! I don't know how to do this operation: {operator}")
 
+# ==========================
+# SESSION
+# ==========================
+class Session:
+    """Keeps one Interpreter alive so code can be run a few statements at a time"""
+    def __init__(self, interpreter: Optional[Interpreter] = None):
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
+        self.optimizer = Optimizer()
+
+    def is_complete(self, code: str) -> bool:
+        try:
+            tokens = Lexer(code).tokenize()
+        except SyntaxError:
+            # Let execute() report the mistake
+            return True
+
+        depth = 0
+        for token in tokens:
+            if token.type == 'LBRACE':
+                depth += 1
+            elif token.type == 'RBRACE':
+                depth -= 1
+        return depth <= 0
+
+    def awaits_else(self, code: str) -> bool:
+        """True when complete `code` ends with an `if` that an `else` on the next line could still join"""
+        try:
+            ast = Parser(Lexer(code).tokenize()).parse()
+        except SyntaxError:
+            return False
+        return bool(ast) and isinstance(ast[-1], IfNode) and ast[-1].else_body is None
+
+    def starts_with_else(self, code: str) -> bool:
+        try:
+            tokens = Lexer(code).tokenize()
+        except SyntaxError:
+            return False
+        return bool(tokens) and tokens[0].type == 'KEYWORD' and tokens[0].value == 'else'
+
+    def execute(self, code: str) -> Any:
+        tokens = Lexer(code).tokenize()
+        ast = Parser(tokens).parse()
+        ast = self.optimizer.optimize(ast)
+        return self.interpreter.interpret(ast)
+
+    def reset(self):
+        self.interpreter.variables.clear()
+        self.interpreter.cache.clear()
+
+    def dump(self) -> str:
+        # Copy first, since the GUI may ask while another thread is running code
+        variables = dict(self.interpreter.variables)
+        if not variables:
+            return "(no variables yet)"
+        return "\n".join(f"{name} = {value!r}" for name, value in variables.items())
+
+def run_repl():
+    print("Welcome to the JuniorCode playground!")
+    print("Type a statement and press Enter to run it.")
+    print("Commands: ':vars' shows your variables, ':reset' forgets them, ':quit' leaves.")
+
+    session = Session()
+    code_lines = []
+    waiting_for_else = False
+    while True:
+        try:
+            line = input("... " if code_lines else "> ")
+        except KeyboardInterrupt:
+            print("\nBye bye!")
+            return
+        except EOFError:
+            if waiting_for_else:
+                run_repl_code(session, "\n".join(code_lines))
+            print("\nBye bye!")
+            return
+
+        if waiting_for_else:
+            waiting_for_else = False
+            if not session.starts_with_else(line):
+                # The if had no else after all, so run it and treat this line as new input
+                run_repl_code(session, "\n".join(code_lines))
+                code_lines = []
+
+        if not code_lines:
+            command = line.strip()
+            if command in (':quit', 'END'):
+                print("Bye bye!")
+                return
+            if command == ':vars':
+                print(session.dump())
+                continue
+            if command == ':reset':
+                session.reset()
+                print("All variables forgotten!")
+                continue
+            if not command:
+                continue
+
+        code_lines.append(line)
+        code = "\n".join(code_lines)
+        if not session.is_complete(code):
+            continue
+        if session.awaits_else(code):
+            waiting_for_else = True
+            continue
+        code_lines = []
+        run_repl_code(session, code)
+
+def run_repl_code(session: Session, code: str):
+    try:
+        session.execute(code)
+    except KeyboardInterrupt:
+        print("\nStopped! Your variables are still here.")
+    except SyntaxError as e:
+        print(f"🚨 {str(e)}")
+    except Exception as e:
+        print(f"🤔 Oops! Something went wrong: {str(e)}")
+
+# ==========================
+# DEBUGGER
+# ==========================
+class StopDebugging(Exception):
+    pass
+
+_MISSING = object()
+
+class Debugger:
+    """Pauses an Interpreter at breakpoints, when a watched variable changes, or at
+    every statement while stepping.
+
+    Only the statements that need one of those checks are wrapped in a TraceNode,
+    so every other line runs exactly as fast as it does without a debugger.
+    `on_pause(debugger, line, reason)` decides what happens next by returning
+    'step', 'continue' or 'stop'.
+    """
+    def __init__(self, on_pause: Callable[['Debugger', int, str], str]):
+        self.on_pause = on_pause
+        self.breakpoints: Dict[int, Any] = {}
+        self.watches: Dict[str, Any] = {}
+        self.stepping = False
+        self.paused_line: Optional[int] = None
+        self.interpreter: Optional[Interpreter] = None
+        self.statements: List[tuple] = []
+
+    def add_breakpoint(self, line: int, condition: Optional[str] = None):
+        expr = None
+        if condition is not None:
+            parser = Parser(Lexer(condition).tokenize())
+            expr = parser.parse_expression()
+            if not parser.is_at_end():
+                parser.raise_error("Oops! A breakpoint condition can only have one expression!")
+        self.breakpoints[line] = expr
+        self.instrument()
+
+    def remove_breakpoint(self, line: int):
+        self.breakpoints.pop(line, None)
+        self.instrument()
+
+    def add_watch(self, name: str):
+        self.watches[name] = self.interpreter.variables.get(name, _MISSING) if self.interpreter else _MISSING
+        self.instrument()
+
+    def remove_watch(self, name: str):
+        self.watches.pop(name, None)
+        self.instrument()
+
+    def attach(self, interpreter: Interpreter, nodes: List[ASTNode]):
+        """Prepare `nodes` to be run by `interpreter` under this debugger"""
+        self.interpreter = interpreter
+        self.statements = []
+        self.collect(nodes, None)
+        for name in self.watches:
+            self.watches[name] = interpreter.variables.get(name, _MISSING)
+        self.instrument()
+
+    def collect(self, body: List[ASTNode], repeat_var: Optional[str]):
+        for index, node in enumerate(body):
+            if isinstance(node, TraceNode):
+                node = node.statement
+            # Only the first statement of a repeat body sees its counter change
+            self.statements.append((body, index, node, repeat_var if index == 0 else None))
+
+            while isinstance(node, CacheScopeNode):
+                node = node.node
+            if isinstance(node, IfNode):
+                self.collect(node.if_body, None)
+                self.collect(node.else_body or [], None)
+            elif isinstance(node, RepeatNode):
+                self.collect(node.body, node.var_name)
+            elif isinstance(node, LoopNode):
+                self.collect(node.body, None)
+
+    def instrument(self):
+        for body, index, statement, repeat_var in self.statements:
+            if self.needs_check(statement, repeat_var):
+                if not isinstance(body[index], TraceNode):
+                    body[index] = TraceNode(statement, self)
+            else:
+                body[index] = statement
+
+    def needs_check(self, statement: ASTNode, repeat_var: Optional[str]) -> bool:
+        if self.stepping or self.line_of(statement) in self.breakpoints:
+            return True
+        if repeat_var in self.watches:
+            return True
+        return isinstance(statement, VarNode) and statement.name in self.watches
+
+    def before(self, node: TraceNode):
+        reasons = []
+        if self.stepping:
+            reasons.append("step")
+        if node.line in self.breakpoints and self.condition_holds(self.breakpoints[node.line]):
+            reasons.append("breakpoint")
+        reasons.extend(self.changed_watches())
+        if reasons:
+            self.pause(node.line, ", ".join(reasons))
+
+    def after(self, node: TraceNode):
+        if isinstance(node.statement, VarNode) and node.statement.name in self.watches:
+            reasons = self.changed_watches()
+            if reasons:
+                self.pause(node.line, ", ".join(reasons))
+
+    def condition_holds(self, condition: Any) -> bool:
+        if condition is None:
+            return True
+        try:
+            return bool(self.interpreter.evaluate(condition))
+        except Exception:
+            # A condition that can't be worked out yet (e.g. an unknown variable) doesn't stop
+            return False
+
+    def changed_watches(self) -> List[str]:
+        changes = []
+        for name, last_value in self.watches.items():
+            value = self.interpreter.variables.get(name, _MISSING)
+            if value is not last_value and value != last_value:
+                self.watches[name] = value
+                changes.append(f"'{name}' is now {value!r}")
+        return changes
+
+    def pause(self, line: int, reason: str):
+        self.paused_line = line
+        try:
+            command = self.on_pause(self, line, reason)
+        finally:
+            self.paused_line = None
+
+        if command == 'stop':
+            raise StopDebugging("The debugger stopped the program.")
+        stepping = command == 'step'
+        if stepping != self.stepping:
+            self.stepping = stepping
+            self.instrument()
+
+    @staticmethod
+    def line_of(statement: ASTNode) -> int:
+        while isinstance(statement, (CacheScopeNode, TraceNode)):
+            statement = statement.node if isinstance(statement, CacheScopeNode) else statement.statement
+        return statement.line
+
+# ==========================
+# CHECKPOINTS
+# ==========================
+class CheckpointSaved(Exception):
+    pass
+
+class CheckpointInterpreter(Interpreter):
+    """An Interpreter that can save where it is to a file and carry on from there later.
+
+    A checkpoint holds the variables plus, for every body being run, the index of
+    the statement it is on, which branch of an `if` was taken and the current
+    `repeat` counter, and how many `ask` questions were answered so far.
+    Checkpoints are only taken between statements: every `interval` statements,
+    or at the next statement after request_checkpoint().
+    """
+    MAGIC = b"JCKP2"
+    VERSION = marshal.version
+
+    def __init__(self, path: str, interval: Optional[int] = None):
+        super().__init__()
+        self.path = path
+        self.interval = interval
+        self.countdown = interval or sys.maxsize
+        self.stop_requested = False
+        self.frames: List[list] = []
+        self.fingerprint = 0
+        self.resume_frames: Optional[List[list]] = None
+        self.resume_extra: Any = _MISSING
+        # Statements that hold bodies are run here so their position can be tracked;
+        # everything else goes straight to Interpreter.evaluate
+        self.statement_handlers = {
+            IfNode: self.evaluate_if,
+            RepeatNode: self.evaluate_repeat,
+            LoopNode: self.evaluate_loop,
+            CacheScopeNode: self.evaluate_cache_scope,
+            TraceNode: self.evaluate_trace,
+        }
+
+    def interpret(self, nodes: List[ASTNode]):
+        self.fingerprint = program_fingerprint(nodes)
+        return self.run_body(nodes)
+
+    def resume(self, nodes: List[ASTNode]):
+        """Carry on running `nodes` from the checkpoint saved in self.path"""
+        self.restore(nodes)
+        return self.interpret(nodes)
+
+    def restore(self, nodes: List[ASTNode]):
+        """Load the checkpoint for `nodes` without running anything yet"""
+        fingerprint, variables, frames, answered = self.load(self.path)
+        if fingerprint != program_fingerprint(nodes):
+            raise ValueError("Oops! This checkpoint was saved from a different program!")
+        self.variables = variables
+        self.resume_frames = [list(frame) for frame in frames]
+        self.answered = answered
+
+    def request_checkpoint(self, stop: bool = False):
+        # Safe to call from another thread or a signal handler; picked up before the next statement
+        self.stop_requested = self.stop_requested or stop
+        self.countdown = 0
+
+    def checkpoint(self):
+        # Everything shown so far must really be out before we promise not to show it again
+        sys.stdout.flush()
+        self.countdown = self.interval or sys.maxsize
+        data = (self.fingerprint, self.variables, [tuple(frame) for frame in self.frames], self.answered)
+        payload = self.MAGIC + bytes([self.VERSION]) + zlib.compress(marshal.dumps(data, self.VERSION))
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(payload)
+        os.replace(temp_path, self.path)
+        if self.stop_requested:
+            raise CheckpointSaved(f"Saved your progress to '{self.path}'")
+
+    @classmethod
+    def load(cls, path: str) -> tuple:
+        with open(path, "rb") as file:
+            payload = file.read()
+        if not payload.startswith(cls.MAGIC):
+            raise ValueError(f"Oops! '{path}' isn't a JuniorCode checkpoint!")
+        version = payload[len(cls.MAGIC)]
+        if version > marshal.version:
+            raise ValueError(f"Oops! '{path}' was saved by a newer Python!")
+        return marshal.loads(zlib.decompress(payload[len(cls.MAGIC) + 1:]))
+
+    def run_body(self, body: List[ASTNode]) -> Any:
+        start = 0
+        if self.resume_frames is not None:
+            start, extra = self.resume_frames.pop(0)
+            # Only the innermost body can be saved at its end (an empty body, see below)
+            if start > len(body) or (start == len(body) and self.resume_frames):
+                raise ValueError("Oops! This checkpoint doesn't match the program!")
+            if self.resume_frames:
+                # The statement at `start` is the if/repeat/loop we were inside of
+                self.resume_extra = extra
+            else:
+                self.resume_frames = None
+
+        frame = [start, None]
+        self.frames.append(frame)
+        result = None
+        try:
+            if not body:
+                # No statements to count, but a repeat or loop around this must still be stoppable
+                self.countdown -= 1
+                if self.countdown <= 0:
+                    self.checkpoint()
+            for index in range(start, len(body)):
+                frame[0] = index
+                self.countdown -= 1
+                if self.countdown <= 0:
+                    self.checkpoint()
+                result = self.run_statement(body[index])
+        finally:
+            self.frames.pop()
+        return result
+
+    def run_statement(self, node: ASTNode) -> Any:
+        handler = self.statement_handlers.get(node.__class__)
+        if handler is not None:
+            return handler(node)
+        return self.evaluate(node)
+
+    def evaluate_cache_scope(self, node: CacheScopeNode) -> Any:
+        try:
+            return self.run_statement(node.node)
+        finally:
+            for slot in node.slots:
+                self.cache.pop(slot, None)
+
+    def evaluate_trace(self, node: TraceNode) -> Any:
+        node.debugger.before(node)
+        result = self.run_statement(node.statement)
+        node.debugger.after(node)
+        return result
+
+    def take_resume(self) -> Any:
+        extra = self.resume_extra
+        self.resume_extra = _MISSING
+        return extra
+
+    def evaluate_if(self, node: IfNode):
+        branch = self.take_resume()
+        if branch is _MISSING:
+            if self.evaluate(node.condition):
+                branch = 0
+            elif node.else_body:
+                branch = 1
+            else:
+                return
+        self.frames[-1][1] = branch
+        self.run_body(node.if_body if branch == 0 else node.else_body)
+
+    def evaluate_repeat(self, node: RepeatNode):
+        frame = self.frames[-1]
+        start = self.take_resume()
+        if start is not _MISSING:
+            # The counter (and anything the body did to it) is already in the saved variables
+            frame[1] = start
+            self.run_body(node.body)
+            start += 1
+        else:
+            start = node.start
+        for i in range(start, node.end + 1):
+            self.variables[node.var_name] = i
+            frame[1] = i
+            self.run_body(node.body)
+
+    def evaluate_loop(self, node: LoopNode):
+        if self.take_resume() is not _MISSING:
+            self.run_body(node.body)
+        while self.evaluate(node.condition):
+            self.run_body(node.body)
+
+def program_fingerprint(nodes: List[ASTNode]) -> int:
+    """A checksum of the whole program, to catch resuming a different or edited one.
+
+    The optimizer's and debugger's nodes are left out, so the same program gives
+    the same checksum with or without them.
+    """
+    return zlib.crc32(dump_ast(nodes, show_cache=False).encode())
+
 # ==========================
 # MAIN FUNCTION
 # ==========================
@@ -492,7 +1143,10 @@ def run_junior_code():
         parser = Parser(tokens)
         ast = parser.parse()
         
-        # Step 3: Interpret the AST
+        # Step 3: Cache work that doesn't change inside loops
+        ast = Optimizer().optimize(ast)
+        
+        # Step 4: Interpret the AST
         print("\nOutput:")
         interpreter = Interpreter()
         interpreter.interpret(ast)
@@ -502,8 +1156,243 @@ def run_junior_code():
     except Exception as e:
         print(f"🤔 Oops! Something went wrong: {str(e)}")
 
-# Example usage
+# ==========================
+# COMMAND LINE
+# ==========================
+USAGE = """usage: python JuniorCode.py [options] [FILE ...]
+
+Runs each JuniorCode program FILE in turn. Use '-' (or pipe a program in
+with no FILE) to read the program from stdin. With no FILE and a keyboard
+attached, type your program line by line and finish with END.
+
+options:
+  --input FILE           answer 'ask' questions with the lines of FILE
+  --tokens               show the tokens instead of running
+  --ast                  show the syntax tree instead of running
+  --time                 show how long each step took (on stderr)
+  --no-optimize          skip the loop optimizer
+  --checkpoint FILE      save progress to FILE while running (one program only)
+  --checkpoint-every N   statements between checkpoints (default 100000)
+  --resume               carry on from the checkpoint FILE if there is one
+  --repl                 start the playground instead
+  -h, --help             show this help
+
+Exit status is 0 when every program ran, 1 when one had an error, 2 for bad
+options, 75 when stopped (Ctrl+C or SIGTERM) after saving a checkpoint and
+130 when stopped with Ctrl+C without one.
+"""
+
+# Files at least this big are memory-mapped instead of read into a buffer first
+MMAP_THRESHOLD = 1 << 20
+OUTPUT_BUFFER_SIZE = 1 << 20
+EXIT_CHECKPOINT_SAVED = 75
+EXIT_INTERRUPTED = 130
+
+class AnswerFile:
+    """Answers `ask` questions from the lines of a file instead of the keyboard"""
+    def __init__(self, path: str):
+        self.answers = read_source(path).splitlines()
+        self.position = 0
+
+    def ask(self, prompt: str) -> str:
+        if self.position >= len(self.answers):
+            raise EOFError(f"Oops! I ran out of answers when asking: {prompt}")
+        answer = self.answers[self.position]
+        self.position += 1
+        return answer
+
+def read_source(path: str) -> str:
+    if path == '-':
+        return sys.stdin.buffer.read().decode('utf-8')
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < MMAP_THRESHOLD:
+            return file.read().decode('utf-8')
+        import mmap
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, 'utf-8')
+
+def parse_arguments(argv: List[str]) -> Dict[str, Any]:
+    options = {
+        'files': [], 'input': None, 'tokens': False, 'ast': False, 'time': False,
+        'optimize': True, 'checkpoint': None, 'checkpoint_every': '100000',
+        'resume': False, 'repl': False, 'help': False,
+    }
+    flags = {
+        '--tokens': 'tokens', '--ast': 'ast', '--time': 'time', '--resume': 'resume',
+        '--repl': 'repl', '-h': 'help', '--help': 'help',
+    }
+    values = {'--input': 'input', '--checkpoint': 'checkpoint', '--checkpoint-every': 'checkpoint_every'}
+
+    arguments = iter(argv)
+    for argument in arguments:
+        name, equals, value = argument.partition('=')
+        if argument in flags:
+            options[flags[argument]] = True
+        elif argument == '--no-optimize':
+            options['optimize'] = False
+        elif name in values:
+            if not equals:
+                value = next(arguments, None)
+                if value is None:
+                    raise ValueError(f"Oops! '{name}' needs a value after it!")
+            options[values[name]] = value
+        elif argument.startswith('-') and argument != '-':
+            raise ValueError(f"Oops! I don't know the option '{argument}'")
+        else:
+            options['files'].append(argument)
+
+    try:
+        options['checkpoint_every'] = int(options['checkpoint_every'])
+    except ValueError:
+        raise ValueError(f"Oops! '{options['checkpoint_every']}' isn't a number of statements!")
+    if options['checkpoint_every'] < 1:
+        raise ValueError("Oops! --checkpoint-every needs at least 1 statement between checkpoints!")
+    if options['checkpoint'] and len(options['files']) > 1:
+        raise ValueError("Oops! --checkpoint only works with one program at a time!")
+    if options['resume'] and not options['checkpoint']:
+        raise ValueError("Oops! --resume needs --checkpoint FILE to know where to resume from!")
+    return options
+
+def run_file(path: str, options: Dict[str, Any], answers: Optional[AnswerFile], label: str) -> int:
+    timings = []
+    previous_handlers = {}
+    started = time.perf_counter()
+
+    def mark(step):
+        nonlocal started
+        now = time.perf_counter()
+        timings.append(f"{step} {(now - started) * 1000:.2f} ms")
+        started = now
+
+    try:
+        code = read_source(path)
+        mark("read")
 
+        tokens = Lexer(code).tokenize()
+        mark("lex")
+        if options['tokens']:
+            sys.stdout.write("".join(f"{token.line}:{token.column}\t{token.type}\t{token.value!r}\n" for token in tokens))
+            return 0
+
+        ast = Parser(tokens).parse()
+        mark("parse")
+        if options['optimize']:
+            ast = Optimizer().optimize(ast)
+            mark("optimize")
+        if options['ast']:
+            sys.stdout.write(dump_ast(ast) + "\n")
+            return 0
+
+        if options['checkpoint']:
+            interpreter = CheckpointInterpreter(options['checkpoint'], options['checkpoint_every'])
+        else:
+            interpreter = Interpreter()
+        if answers is not None:
+            interpreter.ask = answers.ask
+
+        if options['checkpoint']:
+            import signal
+
+            def stop(signum, frame):
+                if interpreter.stop_requested:
+                    # Asked twice (say, while waiting on an `ask`): stop now, the usual way
+                    signal.signal(signum, previous_handlers[signum] or signal.SIG_DFL)
+                    signal.raise_signal(signum)
+                else:
+                    interpreter.request_checkpoint(stop=True)
+
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, stop)
+            if options['resume'] and os.path.exists(options['checkpoint']):
+                interpreter.restore(ast)
+                if answers is not None:
+                    # Answers used up before the checkpoint belong to questions that won't be asked again
+                    answers.position = interpreter.answered
+                interpreter.interpret(ast)
+            else:
+                interpreter.interpret(ast)
+            # Finished, so the next run should start from the beginning
+            if os.path.exists(options['checkpoint']):
+                os.remove(options['checkpoint'])
+        else:
+            interpreter.interpret(ast)
+        mark("run")
+        return 0
+
+    except CheckpointSaved as e:
+        report_error(f"💾 {label}{str(e)}")
+        return EXIT_CHECKPOINT_SAVED
+    except SyntaxError as e:
+        report_error(f"🚨 {label}{str(e)}")
+        return 1
+    except BrokenPipeError:
+        # Nobody is reading the output any more; main() deals with that
+        raise
+    except Exception as e:
+        report_error(f"🤔 {label}Oops! Something went wrong: {str(e)}")
+        return 1
+    finally:
+        if previous_handlers:
+            import signal
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        if options['time']:
+            sys.stdout.flush()
+            sys.stderr.write(f"{label}{', '.join(timings)}\n")
+
+def report_error(message: str):
+    # Keep errors in order with the buffered output before them
+    sys.stdout.flush()
+    sys.stderr.write(message + "\n")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        options = parse_arguments(sys.argv[1:] if argv is None else argv)
+    except ValueError as e:
+        sys.stderr.write(f"{str(e)}\n\n{USAGE}")
+        return 2
+
+    if options['help']:
+        sys.stdout.write(USAGE)
+        return 0
+    if options['repl']:
+        run_repl()
+        return 0
+
+    files = options['files']
+    if not files:
+        if sys.stdin.isatty():
+            run_junior_code()
+            return 0
+        files = ['-']
+
+    try:
+        answers = AnswerFile(options['input']) if options['input'] else None
+    except OSError as e:
+        sys.stderr.write(f"🤔 Oops! I couldn't read the answers file: {str(e)}\n")
+        return 1
+
+    output = open(sys.stdout.fileno(), 'w', buffering=OUTPUT_BUFFER_SIZE,
+                  encoding='utf-8', closefd=False)
+    previous_stdout, sys.stdout = sys.stdout, output
+    status = 0
+    try:
+        for path in files:
+            label = f"{path}: " if len(files) > 1 else ""
+            status = max(status, run_file(path, options, answers, label))
+    except BrokenPipeError:
+        # Whatever reads our output stopped early (like `| head -1`), so there's nobody to tell.
+        # Send the rest of the output to devnull so flushing it can't fail again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, output.fileno())
+        status = 1
+    except KeyboardInterrupt:
+        output.write("\nBye bye!\n")
+        status = EXIT_INTERRUPTED
+    finally:
+        sys.stdout = previous_stdout
+        output.close()
+    return status
 
 if __name__ == "__main__":
-    run_junior_code()
\ No newline at end of file
+    sys.exit(main())
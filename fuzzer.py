@@ -0,0 +1,448 @@
+"""Differential fuzzer for the JuniorCode engines.
+
+Generates random valid programs from the language grammar, runs each one
+through every engine and checks that the output, the final variables and
+any error match the plain Interpreter exactly. Mismatches are shrunk to a
+small program that still shows the difference.
+
+    python fuzzer.py --count 500 --seed 1 --size 12 --depth 3 --trips 4
+"""
+from JuniorCode import *
+import argparse
+import contextlib
+import copy
+import io
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+class Outcome(NamedTuple):
+    output: str
+    variables: Dict[str, str]
+    error: Optional[tuple]
+    seconds: float
+
+    def same_as(self, other: 'Outcome') -> bool:
+        return (self.output, self.variables, self.error) == (other.output, other.variables, other.error)
+
+# ==========================
+# PROGRAM GENERATOR
+# ==========================
+class ProgramGenerator:
+    """Builds random programs that follow the grammar in Parser.
+
+    Expressions are built in the same shape the parser produces (terms under
+    `+`/`-`, primaries under `*`/`/`), so rendering them without brackets and
+    parsing them again gives back the same tree. Number and string variables
+    are kept apart so most programs run to the end, and every `loop` gets its
+    own counter so programs always finish. `error_rate` is the chance of a
+    deliberately bad expression (unknown variable, text minus text, ...).
+    """
+    NUMBER_VARS = ["a", "b", "c", "d"]
+    STRING_VARS = ["s", "t", "u"]
+    WORDS = ["hi", "x", "=", "ok", "Junior", " ", "done!", ""]
+    COMPARISONS = ['EQUALS', 'NOT_EQUALS', 'LESS', 'GREATER', 'LESS_EQUAL', 'GREATER_EQUAL']
+
+    def __init__(self, rng: random.Random, size: int = 12, depth: int = 3, trips: int = 4,
+                 error_rate: float = 0.005):
+        self.rng = rng
+        self.size = size
+        self.depth = depth
+        self.trips = trips
+        self.error_rate = error_rate
+        self.counters = itertools.count()
+        self.repeat_vars: List[str] = []
+
+    def generate(self) -> List[ASTNode]:
+        self.counters = itertools.count()
+        self.repeat_vars = []
+        # Give every variable a value first so most programs get past their first line
+        prelude = [VarNode(name, self.rng.randint(0, 9)) for name in self.NUMBER_VARS]
+        prelude += [VarNode(name, self.rng.choice(self.WORDS)) for name in self.STRING_VARS]
+        return prelude + self.body(self.size, self.depth)
+
+    def body(self, size: int, depth: int) -> List[ASTNode]:
+        statements = []
+        while len(statements) < size:
+            statements.extend(self.statement(depth))
+        return statements
+
+    def statement(self, depth: int) -> List[ASTNode]:
+        kinds = ['show', 'number', 'string', 'ask']
+        if depth > 0:
+            kinds += ['if', 'repeat', 'loop']
+        kind = self.rng.choice(kinds)
+        inner = max(1, self.size // 3)
+
+        if kind == 'show':
+            value = self.number_expr(2) if self.rng.random() < 0.5 else self.string_expr(2)
+            return [ShowNode(value)]
+        if kind == 'number':
+            return [VarNode(self.rng.choice(self.NUMBER_VARS), self.number_expr(2))]
+        if kind == 'string':
+            return [VarNode(self.rng.choice(self.STRING_VARS), self.string_expr(2))]
+        if kind == 'ask':
+            return [VarNode(self.rng.choice(self.STRING_VARS), AskNode(self.rng.choice(["Name?", "Again?"])))]
+        if kind == 'if':
+            if_body = self.body(self.rng.randint(1, inner), depth - 1)
+            else_body = self.body(self.rng.randint(1, inner), depth - 1) if self.rng.random() < 0.5 else None
+            return [IfNode(self.condition(), if_body, else_body)]
+        if kind == 'repeat':
+            var_name = f"i{len(self.repeat_vars)}"
+            start = self.rng.randint(1, 3)
+            # Sometimes empty (end before start), otherwise up to `trips` rounds
+            end = start + self.rng.randint(-1, self.trips - 1)
+            self.repeat_vars.append(var_name)
+            body = self.body(self.rng.randint(1, inner), depth - 1)
+            self.repeat_vars.pop()
+            return [RepeatNode(var_name, start, end, body)]
+
+        counter = f"k{next(self.counters)}"
+        body = self.body(self.rng.randint(1, inner), depth - 1)
+        step = VarNode(counter, BinaryOpNode(IdentifierNode(counter), 'PLUS', 1))
+        step.loop_step = True
+        loop = LoopNode(BinaryOpNode(IdentifierNode(counter), 'LESS', self.rng.randint(0, self.trips)), body + [step])
+        return [VarNode(counter, 0), loop]
+
+    def broken(self) -> bool:
+        return self.rng.random() < self.error_rate
+
+    def number_primary(self) -> Any:
+        if self.broken():
+            return IdentifierNode(self.rng.choice(["nothing", "s"]))
+        choice = self.rng.random()
+        if choice < 0.4:
+            return self.rng.randint(0, 9) if self.rng.random() < 0.8 else self.rng.choice([0.5, 1.5, 2.25])
+        if choice < 0.6 and self.repeat_vars:
+            return IdentifierNode(self.rng.choice(self.repeat_vars))
+        return IdentifierNode(self.rng.choice(self.NUMBER_VARS))
+
+    def number_term(self, depth: int) -> Any:
+        if depth <= 0 or self.rng.random() < 0.6:
+            return self.number_primary()
+        if self.rng.random() < 0.5:
+            # Small literal factors keep numbers from growing out of hand inside loops
+            return BinaryOpNode(self.number_term(depth - 1), 'MULTIPLY', self.rng.randint(0, 3))
+        if self.broken():
+            divisor = 0
+        else:
+            divisor = self.rng.randint(1, 4) if self.rng.random() < 0.9 else self.number_primary()
+        return BinaryOpNode(self.number_term(depth - 1), 'DIVIDE', divisor)
+
+    def number_expr(self, depth: int) -> Any:
+        if depth <= 0 or self.rng.random() < 0.4:
+            return self.number_term(depth)
+        operator = self.rng.choice(['PLUS', 'MINUS'])
+        return BinaryOpNode(self.number_expr(depth - 1), operator, self.number_term(depth - 1))
+
+    def string_expr(self, depth: int) -> Any:
+        # At most one string variable, so assignments in loops grow text slowly
+        parts = [self.rng.choice(self.WORDS)]
+        if self.rng.random() < 0.6:
+            parts.append(IdentifierNode(self.rng.choice(self.STRING_VARS)))
+        for _ in range(self.rng.randint(0, depth)):
+            parts.append(self.number_term(1) if self.rng.random() < 0.5 else self.rng.choice(self.WORDS))
+        self.rng.shuffle(parts)
+
+        expr = parts[0]
+        for part in parts[1:]:
+            expr = BinaryOpNode(expr, 'PLUS', part)
+        if self.broken():
+            expr = BinaryOpNode(expr, 'MINUS', self.rng.choice(self.WORDS))
+        return expr
+
+    def condition(self) -> Any:
+        choice = self.rng.random()
+        if choice < 0.7 or self.broken():
+            return BinaryOpNode(self.number_expr(1), self.rng.choice(self.COMPARISONS), self.number_expr(1))
+        if choice < 0.9:
+            return BinaryOpNode(IdentifierNode(self.rng.choice(self.STRING_VARS)),
+                                self.rng.choice(['EQUALS', 'NOT_EQUALS']), self.rng.choice(self.WORDS))
+        return self.number_primary()
+
+# ==========================
+# RENDERING
+# ==========================
+OPERATOR_SYMBOLS = {token_type: symbol for symbol, token_type in Lexer.OPERATORS.items()}
+
+def render(nodes: List[ASTNode], depth: int = 0) -> str:
+    return "\n".join(render_statement(node, depth) for node in nodes)
+
+def render_statement(node: ASTNode, depth: int = 0) -> str:
+    pad = "    " * depth
+    if isinstance(node, ShowNode):
+        return f"{pad}show {render_expr(node.value)}"
+    if isinstance(node, VarNode):
+        if isinstance(node.value, AskNode):
+            return f'{pad}var {node.name} = ask "{node.value.prompt}"'
+        return f"{pad}var {node.name} = {render_expr(node.value)}"
+    if isinstance(node, IfNode):
+        text = f"{pad}if {render_expr(node.condition)} {{\n{render(node.if_body, depth + 1)}\n{pad}}}"
+        if node.else_body is not None:
+            text += f" else {{\n{render(node.else_body, depth + 1)}\n{pad}}}"
+        return text
+    if isinstance(node, RepeatNode):
+        return f"{pad}repeat {node.var_name} {node.start} to {node.end} {{\n{render(node.body, depth + 1)}\n{pad}}}"
+    if isinstance(node, LoopNode):
+        return f"{pad}loop {render_expr(node.condition)} {{\n{render(node.body, depth + 1)}\n{pad}}}"
+    raise ValueError(f"Oops! I can't render {type(node).__name__}")
+
+def render_expr(expr: Any) -> str:
+    if isinstance(expr, BinaryOpNode):
+        return f"{render_expr(expr.left)} {OPERATOR_SYMBOLS[expr.operator]} {render_expr(expr.right)}"
+    if isinstance(expr, IdentifierNode):
+        return expr.name
+    if isinstance(expr, str):
+        return f'"{expr}"'
+    return repr(expr)
+
+# ==========================
+# ENGINES
+# ==========================
+class Answers:
+    """Hands out the same `ask` answers, over and over, to every engine"""
+    def __init__(self, answers: List[str]):
+        self.answers = answers
+        self.position = 0
+
+    def ask(self, prompt: str) -> str:
+        answer = self.answers[self.position % len(self.answers)]
+        self.position += 1
+        return answer
+
+class _Interrupted(Exception):
+    pass
+
+class _StopAtFirstCheckpoint(CheckpointInterpreter):
+    def checkpoint(self):
+        super().checkpoint()
+        raise _Interrupted()
+
+def parse_program(source: str, optimize: bool) -> List[ASTNode]:
+    ast = Parser(Lexer(source).tokenize()).parse()
+    return Optimizer().optimize(ast) if optimize else ast
+
+def run_plain(source: str, answers: Answers, optimize: bool = False) -> Interpreter:
+    interpreter = Interpreter()
+    interpreter.ask = answers.ask
+    interpreter.interpret(parse_program(source, optimize))
+    return interpreter
+
+def run_optimized(source: str, answers: Answers) -> Interpreter:
+    return run_plain(source, answers, optimize=True)
+
+def run_checkpoint_tracking(source: str, answers: Answers) -> Interpreter:
+    with tempfile.TemporaryDirectory() as directory:
+        interpreter = CheckpointInterpreter(os.path.join(directory, "run.jck"))
+        interpreter.ask = answers.ask
+        interpreter.interpret(parse_program(source, True))
+        return interpreter
+
+def run_resumed(source: str, answers: Answers) -> Interpreter:
+    """Stops at the first checkpoint, then carries on in a brand new interpreter"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run.jck")
+        interpreter = _StopAtFirstCheckpoint(path, interval=5)
+        interpreter.ask = answers.ask
+        try:
+            interpreter.interpret(parse_program(source, True))
+            return interpreter
+        except _Interrupted:
+            pass
+        interpreter = CheckpointInterpreter(path)
+        interpreter.ask = answers.ask
+        interpreter.resume(parse_program(source, True))
+        return interpreter
+
+def run_debugger(source: str, answers: Answers) -> Interpreter:
+    """Steps through every statement while watching every variable"""
+    ast = parse_program(source, True)
+    interpreter = Interpreter()
+    interpreter.ask = answers.ask
+    debugger = Debugger(lambda debugger, line, reason: 'step')
+    debugger.stepping = True
+    for name in ProgramGenerator.NUMBER_VARS + ProgramGenerator.STRING_VARS:
+        debugger.add_watch(name)
+    debugger.attach(interpreter, ast)
+    interpreter.interpret(ast)
+    return interpreter
+
+def run_session(source: str, answers: Answers) -> Interpreter:
+    """Feeds the program to a Session one top-level statement at a time"""
+    session = Session()
+    session.interpreter.ask = answers.ask
+    for node in Parser(Lexer(source).tokenize()).parse():
+        session.execute(render_statement(node))
+    return session.interpreter
+
+REFERENCE = 'interpreter'
+ENGINES: Dict[str, Callable[[str, Answers], Interpreter]] = {
+    'interpreter': run_plain,
+    'optimized': run_optimized,
+    'checkpoint': run_checkpoint_tracking,
+    'resumed': run_resumed,
+    'debugger': run_debugger,
+    'session': run_session,
+}
+
+def run_engine(engine: Callable[[str, Answers], Interpreter], source: str, answers: List[str]) -> Outcome:
+    output = io.StringIO()
+    error = None
+    variables = {}
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        try:
+            interpreter = engine(source, Answers(answers))
+            variables = {name: repr(value) for name, value in interpreter.variables.items()}
+        except Exception as e:
+            error = (type(e).__name__, str(e))
+    return Outcome(output.getvalue(), variables, error, time.perf_counter() - started)
+
+def find_mismatches(source: str, answers: List[str], engines: List[str]) -> Dict[str, tuple]:
+    """Runs every engine and returns the ones that disagree with the reference"""
+    reference = run_engine(ENGINES[REFERENCE], source, answers)
+    mismatches = {}
+    for name in engines:
+        outcome = run_engine(ENGINES[name], source, answers)
+        if not outcome.same_as(reference):
+            mismatches[name] = (reference, outcome)
+    return mismatches
+
+# ==========================
+# SHRINKING
+# ==========================
+def shrink(program: List[ASTNode], still_fails: Callable[[List[ASTNode]], bool]) -> List[ASTNode]:
+    """Keeps making the program smaller while `still_fails` says it shows the problem"""
+    changed = True
+    while changed:
+        changed = False
+        for candidate in smaller_programs(program):
+            if still_fails(candidate):
+                program = candidate
+                changed = True
+                break
+    return program
+
+def smaller_programs(program: List[ASTNode]):
+    bodies = []
+    collect_bodies(program, bodies)
+    for body_index, body in enumerate(bodies):
+        for index, node in enumerate(body):
+            # Never touch a loop's counter step, or the loop would run forever
+            if getattr(node, 'loop_step', False):
+                continue
+            yield edit(program, body_index, lambda body, i=index: body.pop(i))
+            for replacement in simpler_statements(node):
+                yield edit(program, body_index, lambda body, i=index, r=replacement: body.__setitem__(slice(i, i + 1), r))
+
+def simpler_statements(node: ASTNode) -> List[List[ASTNode]]:
+    simpler = []
+    if isinstance(node, IfNode):
+        simpler.append(node.if_body)
+        if node.else_body is not None:
+            simpler.append(node.else_body)
+            simpler.append([IfNode(node.condition, node.if_body)])
+    elif isinstance(node, RepeatNode):
+        simpler.append(node.body)
+        if node.end > node.start:
+            simpler.append([RepeatNode(node.var_name, node.start, node.end - 1, node.body)])
+    elif isinstance(node, LoopNode):
+        simpler.append([statement for statement in node.body if not getattr(statement, 'loop_step', False)])
+
+    # Loop conditions are left alone so loops stay bounded
+    for attribute in ('value', 'condition'):
+        expr = getattr(node, attribute, None)
+        if isinstance(expr, BinaryOpNode) and not isinstance(node, LoopNode):
+            for part in (expr.left, expr.right):
+                smaller = copy.copy(node)
+                setattr(smaller, attribute, part)
+                simpler.append([smaller])
+    return simpler
+
+def collect_bodies(body: List[ASTNode], bodies: List[List[ASTNode]]):
+    bodies.append(body)
+    for node in body:
+        if isinstance(node, IfNode):
+            collect_bodies(node.if_body, bodies)
+            if node.else_body is not None:
+                collect_bodies(node.else_body, bodies)
+        elif isinstance(node, (RepeatNode, LoopNode)):
+            collect_bodies(node.body, bodies)
+
+def edit(program: List[ASTNode], body_index: int, change: Callable[[List[ASTNode]], Any]) -> List[ASTNode]:
+    program = copy.deepcopy(program)
+    bodies = []
+    collect_bodies(program, bodies)
+    change(bodies[body_index])
+    return program
+
+# ==========================
+# MAIN FUNCTION
+# ==========================
+def fuzz(count: int, seed: int, size: int, depth: int, trips: int, error_rate: float,
+         engines: List[str], max_failures: int = 1) -> int:
+    rng = random.Random(seed)
+    generator = ProgramGenerator(rng, size, depth, trips, error_rate)
+    answers = ["Ada", "yes", "42"]
+    seconds = {name: 0.0 for name in [REFERENCE] + engines}
+    errors = {}
+    failures = 0
+    tried = 0
+
+    for number in range(count):
+        tried += 1
+        program = generator.generate()
+        source = render(program)
+        outcomes = {name: run_engine(ENGINES[name], source, answers) for name in seconds}
+        reference = outcomes[REFERENCE]
+        for name, outcome in outcomes.items():
+            seconds[name] += outcome.seconds
+        kind = reference.error[0] if reference.error else "finished"
+        errors[kind] = errors.get(kind, 0) + 1
+
+        broken = [name for name in engines if not outcomes[name].same_as(reference)]
+        if not broken:
+            continue
+
+        failures += 1
+        print(f"Program {number} (seed {seed}): {', '.join(broken)} gave different results from {REFERENCE}")
+        minimal = shrink(program, lambda candidate: bool(
+            set(broken) & set(find_mismatches(render(candidate), answers, broken))))
+        minimal_source = render(minimal)
+        print("Smallest program that still disagrees:")
+        print(minimal_source)
+        for name, (expected, actual) in find_mismatches(minimal_source, answers, broken).items():
+            print(f"  {REFERENCE}: {expected.output!r} {expected.variables} {expected.error}")
+            print(f"  {name}: {actual.output!r} {actual.variables} {actual.error}")
+        print()
+        if failures >= max_failures:
+            break
+
+    print(f"Ran {tried} programs, {failures} disagreed.")
+    print("How programs ended: " + ", ".join(f"{kind} {total}" for kind, total in sorted(errors.items())))
+    for name in engines:
+        ratio = seconds[name] / seconds[REFERENCE] if seconds[REFERENCE] else 0.0
+        print(f"  {name:<12} {seconds[name] * 1000:9.1f} ms  {ratio:5.2f}x {REFERENCE}")
+    return 1 if failures else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check every JuniorCode engine against the plain Interpreter.")
+    parser.add_argument("--count", type=int, default=200, help="how many programs to try")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, to repeat a run")
+    parser.add_argument("--size", type=int, default=12, help="statements at the top level of each program")
+    parser.add_argument("--depth", type=int, default=3, help="how deeply if/repeat/loop may nest")
+    parser.add_argument("--trips", type=int, default=4, help="most rounds a repeat or loop runs")
+    parser.add_argument("--errors", type=float, default=0.005, help="chance of a deliberately bad expression")
+    parser.add_argument("--engines", nargs="+", choices=[name for name in ENGINES if name != REFERENCE],
+                        default=[name for name in ENGINES if name != REFERENCE], help="engines to check")
+    parser.add_argument("--max-failures", type=int, default=1, help="stop after this many disagreements")
+    args = parser.parse_args(argv)
+    return fuzz(args.count, args.seed, args.size, args.depth, args.trips, args.errors,
+                args.engines, args.max_failures)
+
+if __name__ == "__main__":
+    sys.exit(main())